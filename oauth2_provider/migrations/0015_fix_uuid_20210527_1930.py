@@ -1,11 +1,19 @@
 from django.db import migrations, models
 import uuid
 
+BATCH_SIZE = 1000
+
 def gen_uuid(apps, schema_editor):
     MyModel = apps.get_model('oauth2_provider', 'idtoken')
-    for row in MyModel.objects.all():
+    rows = []
+    for row in MyModel.objects.only('pk', 'jti').order_by('pk').iterator(chunk_size=2 * BATCH_SIZE):
         row.jti = uuid.uuid4()
-        row.save(update_fields=['jti'])
+        rows.append(row)
+        if len(rows) >= BATCH_SIZE:
+            MyModel.objects.bulk_update(rows, ['jti'])
+            rows = []
+    if rows:
+        MyModel.objects.bulk_update(rows, ['jti'])
 
 class Migration(migrations.Migration):
 
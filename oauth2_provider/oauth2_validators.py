@@ -1,8 +1,13 @@
 import base64
 import binascii
+import copy
+import hashlib
+import hmac
 import http.client
 import json
 import logging
+import threading
+import time
 import uuid
 from collections import OrderedDict
 from datetime import datetime, timedelta
@@ -11,11 +16,12 @@ from urllib.parse import unquote_plus
 import requests
 from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
-from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
 from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.http import HttpRequest
-from django.utils import dateformat, timezone
+from django.utils import timezone
 from django.utils.timezone import make_aware
 from django.utils.translation import gettext_lazy as _
 from jwcrypto import jws, jwt
@@ -23,6 +29,8 @@ from jwcrypto.common import JWException
 from jwcrypto.jwt import JWTExpired
 from oauthlib.oauth2.rfc6749 import utils
 from oauthlib.openid import RequestValidator
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from .exceptions import FatalClientError
 from .models import (
@@ -54,6 +62,16 @@ GRANT_TYPE_MAPPING = {
     ),
 }
 
+RESPONSE_TYPE_MAPPING = {
+    "code": AbstractApplication.GRANT_AUTHORIZATION_CODE,
+    "token": AbstractApplication.GRANT_IMPLICIT,
+    "id_token": AbstractApplication.GRANT_IMPLICIT,
+    "id_token token": AbstractApplication.GRANT_IMPLICIT,
+    "code id_token": AbstractApplication.GRANT_OPENID_HYBRID,
+    "code token": AbstractApplication.GRANT_OPENID_HYBRID,
+    "code id_token token": AbstractApplication.GRANT_OPENID_HYBRID,
+}
+
 Application = get_application_model()
 AccessToken = get_access_token_model()
 IDToken = get_id_token_model()
@@ -62,6 +80,79 @@ RefreshToken = get_refresh_token_model()
 UserModel = get_user_model()
 
 
+class _ExpiringCache:
+    """
+    Thread-safe, size-bounded LRU mapping whose entries expire after a per-entry timeout.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value, deadline = self._entries[key]
+            except KeyError:
+                return None
+            if deadline <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout, maxsize):
+        if timeout <= 0 or maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_matching(self, predicate):
+        """
+        Remove every entry whose value satisfies ``predicate``
+        """
+        with self._lock:
+            for key in [key for key, (value, _deadline) in self._entries.items() if predicate(value)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Keeps connections to the introspection endpoint alive between requests
+_introspection_session = requests.Session()
+_introspection_adapter = HTTPAdapter(max_retries=Retry(total=1, backoff_factor=0.1))
+_introspection_session.mount("http://", _introspection_adapter)
+_introspection_session.mount("https://", _introspection_adapter)
+
+# Maps client_id to its Application, see APPLICATION_CACHE_SECONDS
+_application_cache = _ExpiringCache()
+
+
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+def _invalidate_application_cache(sender, instance, **kwargs):
+    # match on pk, the entry may still be cached under a client_id the application no longer has
+    _application_cache.delete_matching(lambda application: application.pk == instance.pk)
+    # the signing key of the application may have changed
+    _id_token_cache.delete_matching(lambda value: value[1] == instance.pk)
+
+
+# Maps (introspection URL, token digest) to the introspection endpoint response
+_introspection_cache = _ExpiringCache()
+
+# Maps ID token JWTs whose signature has already been verified to their ``(jti, application_id)``
+_id_token_cache = _ExpiringCache()
+
+
 class OAuth2Validator(RequestValidator):
     def _extract_basic_auth(self, request):
         """
@@ -69,18 +160,10 @@ class OAuth2Validator(RequestValidator):
         otherwise return None
         """
         auth = request.headers.get("HTTP_AUTHORIZATION", None)
-        if not auth:
-            return None
-
-        splitted = auth.split(" ", 1)
-        if len(splitted) != 2:
+        if not auth or not auth.startswith("Basic "):
             return None
-        auth_type, auth_string = splitted
 
-        if auth_type != "Basic":
-            return None
-
-        return auth_string
+        return auth[len("Basic ") :]
 
     def _authenticate_basic_auth(self, request):
         """
@@ -122,7 +205,7 @@ class OAuth2Validator(RequestValidator):
         elif request.client.client_id != client_id:
             log.debug("Failed basic auth: wrong client id %s" % client_id)
             return False
-        elif request.client.client_secret != client_secret:
+        elif not self._check_secret(client_secret, request.client.client_secret):
             log.debug("Failed basic auth: wrong client secret %s" % client_secret)
             return False
         else:
@@ -147,7 +230,7 @@ class OAuth2Validator(RequestValidator):
         if self._load_application(client_id, request) is None:
             log.debug("Failed body auth: Application %s does not exists" % client_id)
             return False
-        elif request.client.client_secret != client_secret:
+        elif not self._check_secret(client_secret, request.client.client_secret):
             log.debug("Failed body auth: wrong client secret %s" % client_secret)
             return False
         else:
@@ -163,7 +246,7 @@ class OAuth2Validator(RequestValidator):
         assert hasattr(request, "client"), '"request" instance has no "client" attribute'
 
         try:
-            request.client = request.client or Application.objects.get(client_id=client_id)
+            request.client = request.client or self._get_application(client_id)
             # Check that the application can be used (defaults to always True)
             if not request.client.is_usable(request):
                 log.debug("Failed body authentication: Application %r is disabled" % (client_id))
@@ -173,6 +256,32 @@ class OAuth2Validator(RequestValidator):
             log.debug("Failed body authentication: Application %r does not exist" % (client_id))
             return None
 
+    def _check_secret(self, provided_secret, stored_secret):
+        """
+        Compare the secrets in constant time, to not leak how much of the secret matched
+        """
+        if provided_secret is None or stored_secret is None:
+            return provided_secret == stored_secret
+        return hmac.compare_digest(provided_secret.encode("utf-8"), stored_secret.encode("utf-8"))
+
+    def _get_application(self, client_id):
+        """
+        Return the Application for given client_id, going through the in-process
+        cache when APPLICATION_CACHE_SECONDS is set
+        """
+        cache_seconds = oauth2_settings.APPLICATION_CACHE_SECONDS
+        if not cache_seconds:
+            return Application.objects.get(client_id=client_id)
+
+        application = _application_cache.get(client_id)
+        if application is None:
+            application = Application.objects.get(client_id=client_id)
+            _application_cache.set(
+                client_id, application, cache_seconds, oauth2_settings.APPLICATION_CACHE_SIZE
+            )
+        # each request gets its own instance, the cached one is never handed out
+        return copy.copy(application)
+
     def _set_oauth2_error_on_request(self, request, access_token, scopes):
         if access_token is None:
             error = OrderedDict(
@@ -307,36 +416,24 @@ class OAuth2Validator(RequestValidator):
         that user to the UserModel. Also cache the access_token up until its expiry time or a
         configured maximum time.
 
+        Introspection responses are kept in memory for up to
+        ``RESOURCE_SERVER_INTROSPECTION_CACHE_SECONDS`` so that repeated lookups of the same
+        token do not hit the authentication server again.
         """
-        headers = None
-        if introspection_token:
-            headers = {"Authorization": "Bearer {}".format(introspection_token)}
-        elif introspection_credentials:
-            client_id = introspection_credentials[0].encode("utf-8")
-            client_secret = introspection_credentials[1].encode("utf-8")
-            basic_auth = base64.b64encode(client_id + b":" + client_secret)
-            headers = {"Authorization": "Basic {}".format(basic_auth.decode("utf-8"))}
-
-        try:
-            response = requests.post(introspection_url, data={"token": token}, headers=headers)
-        except requests.exceptions.RequestException:
-            log.exception("Introspection: Failed POST to %r in token lookup", introspection_url)
-            return None
-
-        # Log an exception when response from auth server is not successful
-        if response.status_code != http.client.OK:
-            log.exception(
-                "Introspection: Failed to get a valid response "
-                "from authentication server. Status code: {}, "
-                "Reason: {}.".format(response.status_code, response.reason)
+        cache_key = (introspection_url, hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest())
+        content = _introspection_cache.get(cache_key)
+        if content is None:
+            content = self._introspect_token(
+                token, introspection_url, introspection_token, introspection_credentials
+            )
+            if content is None:
+                return None
+            cache_timeout = oauth2_settings.RESOURCE_SERVER_INTROSPECTION_CACHE_SECONDS
+            if "exp" in content:
+                cache_timeout = min(cache_timeout, content["exp"] - time.time())
+            _introspection_cache.set(
+                cache_key, content, cache_timeout, oauth2_settings.RESOURCE_SERVER_INTROSPECTION_CACHE_SIZE
             )
-            return None
-
-        try:
-            content = response.json()
-        except ValueError:
-            log.exception("Introspection: Failed to parse response as json")
-            return None
 
         if "active" in content and content["active"] is True:
             if "username" in content:
@@ -372,6 +469,46 @@ class OAuth2Validator(RequestValidator):
 
             return access_token
 
+    def _introspect_token(self, token, introspection_url, introspection_token, introspection_credentials):
+        """
+        POST the token to the introspection endpoint and return the decoded response,
+        or None if the endpoint could not be queried.
+        """
+        headers = None
+        if introspection_token:
+            headers = {"Authorization": "Bearer {}".format(introspection_token)}
+        elif introspection_credentials:
+            client_id = introspection_credentials[0].encode("utf-8")
+            client_secret = introspection_credentials[1].encode("utf-8")
+            basic_auth = base64.b64encode(client_id + b":" + client_secret)
+            headers = {"Authorization": "Basic {}".format(basic_auth.decode("utf-8"))}
+
+        try:
+            response = _introspection_session.post(
+                introspection_url,
+                data={"token": token},
+                headers=headers,
+                timeout=oauth2_settings.RESOURCE_SERVER_INTROSPECTION_TIMEOUT,
+            )
+        except requests.exceptions.RequestException:
+            log.exception("Introspection: Failed POST to %r in token lookup", introspection_url)
+            return None
+
+        # Log an exception when response from auth server is not successful
+        if response.status_code != http.client.OK:
+            log.exception(
+                "Introspection: Failed to get a valid response "
+                "from authentication server. Status code: {}, "
+                "Reason: {}.".format(response.status_code, response.reason)
+            )
+            return None
+
+        try:
+            return response.json()
+        except ValueError:
+            log.exception("Introspection: Failed to parse response as json")
+            return None
+
     def validate_bearer_token(self, token, scopes, request):
         """
         When users try to access resources, check that provided token is valid
@@ -405,11 +542,15 @@ class OAuth2Validator(RequestValidator):
             return False
 
     def _load_access_token(self, token):
-        return AccessToken.objects.select_related("application", "user").filter(token=token).first()
+        # token is unique, a plain get() avoids the ORDER BY added by first()
+        try:
+            return AccessToken.objects.select_related("application", "user").get(token=token)
+        except AccessToken.DoesNotExist:
+            return None
 
     def validate_code(self, client_id, code, client, request, *args, **kwargs):
         try:
-            grant = Grant.objects.get(code=code, application=client)
+            grant = Grant.objects.select_related("user").get(code=code, application=client)
             if not grant.is_expired():
                 request.scopes = grant.scope.split(" ")
                 request.user = grant.user
@@ -427,30 +568,20 @@ class OAuth2Validator(RequestValidator):
         """
         Validate both grant_type is a valid string and grant_type is allowed for current workflow
         """
-        assert grant_type in GRANT_TYPE_MAPPING  # mapping misconfiguration
-        return request.client.allows_grant_type(*GRANT_TYPE_MAPPING[grant_type])
+        allowed_grant_types = GRANT_TYPE_MAPPING.get(grant_type)
+        if allowed_grant_types is None:
+            return False
+        return request.client.allows_grant_type(*allowed_grant_types)
 
     def validate_response_type(self, client_id, response_type, client, request, *args, **kwargs):
         """
         We currently do not support the Authorization Endpoint Response Types registry as in
         rfc:`8.4`, so validate the response_type only if it matches "code" or "token"
         """
-        if response_type == "code":
-            return client.allows_grant_type(AbstractApplication.GRANT_AUTHORIZATION_CODE)
-        elif response_type == "token":
-            return client.allows_grant_type(AbstractApplication.GRANT_IMPLICIT)
-        elif response_type == "id_token":
-            return client.allows_grant_type(AbstractApplication.GRANT_IMPLICIT)
-        elif response_type == "id_token token":
-            return client.allows_grant_type(AbstractApplication.GRANT_IMPLICIT)
-        elif response_type == "code id_token":
-            return client.allows_grant_type(AbstractApplication.GRANT_OPENID_HYBRID)
-        elif response_type == "code token":
-            return client.allows_grant_type(AbstractApplication.GRANT_OPENID_HYBRID)
-        elif response_type == "code id_token token":
-            return client.allows_grant_type(AbstractApplication.GRANT_OPENID_HYBRID)
-        else:
+        grant_type = RESPONSE_TYPE_MAPPING.get(response_type)
+        if grant_type is None:
             return False
+        return client.allows_grant_type(grant_type)
 
     def validate_scopes(self, client_id, scopes, client, request, *args, **kwargs):
         """
@@ -478,12 +609,12 @@ class OAuth2Validator(RequestValidator):
         return oauth2_settings.PKCE_REQUIRED
 
     def get_code_challenge(self, code, request):
-        grant = Grant.objects.get(code=code, application=request.client)
-        return grant.code_challenge or None
+        grants = Grant.objects.filter(code=code, application=request.client)
+        return grants.values_list("code_challenge", flat=True).get() or None
 
     def get_code_challenge_method(self, code, request):
-        grant = Grant.objects.get(code=code, application=request.client)
-        return grant.code_challenge_method or None
+        grants = Grant.objects.filter(code=code, application=request.client)
+        return grants.values_list("code_challenge_method", flat=True).get() or None
 
     def save_authorization_code(self, client_id, code, request, *args, **kwargs):
         self._create_authorization_code(request, code)
@@ -654,12 +785,17 @@ class OAuth2Validator(RequestValidator):
         }
 
         token_type = token_types.get(token_type_hint, AccessToken)
-        try:
-            token_type.objects.get(token=token).revoke()
-        except ObjectDoesNotExist:
-            for other_type in [_t for _t in token_types.values() if _t != token_type]:
-                # slightly inefficient on Python2, but the queryset contains only one instance
-                list(map(lambda t: t.revoke(), other_type.objects.filter(token=token)))
+        other_types = [_t for _t in token_types.values() if _t != token_type]
+        for model in [token_type] + other_types:
+            instances = model.objects.filter(token=token)
+            if model is RefreshToken:
+                # Refresh tokens are only unique together with their revocation date
+                instances = instances.filter(revoked__isnull=True)
+            instances = list(instances)
+            for instance in instances:
+                instance.revoke()
+            if instances:
+                return
 
     def validate_user(self, username, password, client, request, *args, **kwargs):
         """
@@ -699,7 +835,7 @@ class OAuth2Validator(RequestValidator):
         )
         rt = (
             RefreshToken.objects.filter(null_or_recent, token=refresh_token)
-            .select_related("access_token")
+            .select_related("access_token", "application", "user")
             .first()
         )
 
@@ -712,7 +848,6 @@ class OAuth2Validator(RequestValidator):
         request.refresh_token_instance = rt
         return rt.application == client
 
-    @transaction.atomic
     def _save_id_token(self, jti, request, expires, *args, **kwargs):
         scopes = request.scope or " ".join(request.scopes)
 
@@ -756,8 +891,8 @@ class OAuth2Validator(RequestValidator):
         claims.update(
             **{
                 "iss": self.get_oidc_issuer_endpoint(request),
-                "exp": int(dateformat.format(expiration_time, "U")),
-                "auth_time": int(dateformat.format(request.user.last_login, "U")),
+                "exp": int(expiration_time.timestamp()),
+                "auth_time": int(request.user.last_login.timestamp()),
                 "jti": str(uuid.uuid4()),
             }
         )
@@ -775,19 +910,21 @@ class OAuth2Validator(RequestValidator):
         if "nonce" not in id_token and request.nonce:
             id_token["nonce"] = request.nonce
 
+        key = request.client.jwk_key
         header = {
             "typ": "JWT",
             "alg": request.client.algorithm,
         }
         # RS256 consumers expect a kid in the header for verifying the token
         if request.client.algorithm == AbstractApplication.RS256_ALGORITHM:
-            header["kid"] = request.client.jwk_key.thumbprint()
+            header["kid"] = key.thumbprint()
 
         jwt_token = jwt.JWT(
-            header=json.dumps(header, default=str),
+            header=json.dumps(header),
+            # custom claims from get_additional_claims() may hold non-JSON types such as datetimes
             claims=json.dumps(id_token, default=str),
         )
-        jwt_token.make_signed_token(request.client.jwk_key)
+        jwt_token.make_signed_token(key)
         id_token = self._save_id_token(id_token["jti"], request, expiration_time)
         # this is needed by django rest framework
         request.access_token = id_token
@@ -804,9 +941,12 @@ class OAuth2Validator(RequestValidator):
         if not token:
             return False
 
-        id_token = self._load_id_token(token)
+        id_token = self._load_cached_id_token(token)
         if not id_token:
-            return False
+            id_token = self._load_id_token(token)
+            if not id_token:
+                return False
+            self._cache_id_token(token, id_token)
 
         if not id_token.allow_scopes(scopes):
             return False
@@ -825,10 +965,38 @@ class OAuth2Validator(RequestValidator):
         try:
             jwt_token = jwt.JWT(key=key, jwt=token)
             claims = json.loads(jwt_token.claims)
-            return IDToken.objects.get(jti=claims["jti"])
+            return IDToken.objects.select_related("application", "user").get(jti=claims["jti"])
         except (JWException, JWTExpired, IDToken.DoesNotExist):
             return None
 
+    def _load_cached_id_token(self, token):
+        """
+        Load the IDToken of a JWT whose signature was already verified, skipping the
+        key lookup and signature check. Revoked tokens are deleted, so they are never
+        returned from here.
+        """
+        cached = _id_token_cache.get(token)
+        if cached is None:
+            return None
+        jti, _application_id = cached
+        try:
+            id_token = IDToken.objects.select_related("application", "user").get(jti=jti)
+        except IDToken.DoesNotExist:
+            id_token = None
+        if not id_token or id_token.is_expired():
+            _id_token_cache.delete(token)
+            return None
+        return id_token
+
+    def _cache_id_token(self, token, id_token):
+        timeout = min(
+            (id_token.expires - timezone.now()).total_seconds(),
+            oauth2_settings.OIDC_JWT_CACHE_SECONDS,
+        )
+        _id_token_cache.set(
+            token, (id_token.jti, id_token.application_id), timeout, oauth2_settings.OIDC_JWT_CACHE_SIZE
+        )
+
     def _get_key_for_token(self, token):
         """
         Peek at the unvalidated token to discover who it was issued for
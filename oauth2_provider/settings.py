@@ -66,6 +66,8 @@ DEFAULTS = {
     "GRANT_ADMIN_CLASS": "oauth2_provider.admin.GrantAdmin",
     "ID_TOKEN_ADMIN_CLASS": "oauth2_provider.admin.IDTokenAdmin",
     "REFRESH_TOKEN_ADMIN_CLASS": "oauth2_provider.admin.RefreshTokenAdmin",
+    "APPLICATION_CACHE_SECONDS": 0,
+    "APPLICATION_CACHE_SIZE": 1024,
     "REQUEST_APPROVAL_PROMPT": "force",
     "ALLOWED_REDIRECT_URI_SCHEMES": ["http", "https"],
     "OIDC_ENABLED": False,
@@ -86,6 +88,8 @@ DEFAULTS = {
         "client_secret_post",
         "client_secret_basic",
     ],
+    "OIDC_JWT_CACHE_SIZE": 1024,
+    "OIDC_JWT_CACHE_SECONDS": 300,
     # Special settings that will be evaluated at runtime
     "_SCOPES": [],
     "_DEFAULT_SCOPES": [],
@@ -94,6 +98,9 @@ DEFAULTS = {
     "RESOURCE_SERVER_AUTH_TOKEN": None,
     "RESOURCE_SERVER_INTROSPECTION_CREDENTIALS": None,
     "RESOURCE_SERVER_TOKEN_CACHING_SECONDS": 36000,
+    "RESOURCE_SERVER_INTROSPECTION_TIMEOUT": (1, 3),
+    "RESOURCE_SERVER_INTROSPECTION_CACHE_SIZE": 10000,
+    "RESOURCE_SERVER_INTROSPECTION_CACHE_SECONDS": 60,
     # Whether or not PKCE is required
     "PKCE_REQUIRED": False,
     # Whether to re-create OAuthlibCore on every request.
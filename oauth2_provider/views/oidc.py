@@ -6,10 +6,10 @@ from django.urls import reverse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import View
-from jwcrypto import jwk
 
 from ..models import get_application_model
 from ..settings import oauth2_settings
+from ..utils import jwk_from_pem
 from .mixins import OAuthLibMixin, OIDCOnlyMixin
 
 
@@ -71,7 +71,7 @@ class JwksInfoView(OIDCOnlyMixin, View):
     def get(self, request, *args, **kwargs):
         keys = []
         if oauth2_settings.OIDC_RSA_PRIVATE_KEY:
-            key = jwk.JWK.from_pem(oauth2_settings.OIDC_RSA_PRIVATE_KEY.encode("utf8"))
+            key = jwk_from_pem(oauth2_settings.OIDC_RSA_PRIVATE_KEY)
             data = {"alg": "RS256", "use": "sig", "kid": key.thumbprint()}
             data.update(json.loads(key.export_public()))
             keys.append(data)
@@ -7,6 +7,7 @@ from django.contrib.auth import get_user_model
 from django.urls import reverse
 from jwcrypto import jwk
 
+from oauth2_provider import oauth2_validators
 from oauth2_provider.models import get_application_model
 from oauth2_provider.settings import oauth2_settings as _oauth2_settings
 
@@ -17,6 +18,23 @@ Application = get_application_model()
 UserModel = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_validator_caches():
+    """
+    The validator keeps module-level caches, do not let them leak between tests
+    """
+    caches = (
+        oauth2_validators._id_token_cache,
+        oauth2_validators._introspection_cache,
+        oauth2_validators._application_cache,
+    )
+    for cache in caches:
+        cache.clear()
+    yield
+    for cache in caches:
+        cache.clear()
+
+
 class OAuthSettingsWrapper:
     """
     A wrapper around oauth2_settings to ensure that when an overridden value is
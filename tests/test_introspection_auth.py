@@ -128,7 +128,9 @@ class TestTokenIntrospectionAuth(TestCase):
         AccessToken.objects.all().delete()
         UserModel.objects.all().delete()
 
-    @mock.patch("requests.post", side_effect=mocked_requests_post)
+    @mock.patch(
+        "oauth2_provider.oauth2_validators._introspection_session.post", side_effect=mocked_requests_post
+    )
     def test_get_token_from_authentication_server_not_existing_token(self, mock_get):
         """
         Test method _get_token_from_authentication_server with non existing token
@@ -141,7 +143,9 @@ class TestTokenIntrospectionAuth(TestCase):
         )
         self.assertIsNone(token)
 
-    @mock.patch("requests.post", side_effect=mocked_requests_post)
+    @mock.patch(
+        "oauth2_provider.oauth2_validators._introspection_session.post", side_effect=mocked_requests_post
+    )
     def test_get_token_from_authentication_server_existing_token(self, mock_get):
         """
         Test method _get_token_from_authentication_server with existing token
@@ -156,7 +160,9 @@ class TestTokenIntrospectionAuth(TestCase):
         self.assertEqual(token.user.username, "foo_user")
         self.assertEqual(token.scope, "read write dolphin")
 
-    @mock.patch("requests.post", side_effect=mocked_requests_post)
+    @mock.patch(
+        "oauth2_provider.oauth2_validators._introspection_session.post", side_effect=mocked_requests_post
+    )
     def test_get_token_from_authentication_server_expires_timezone(self, mock_get):
         """
         Test method _get_token_from_authentication_server for projects with USE_TZ False
@@ -175,7 +181,9 @@ class TestTokenIntrospectionAuth(TestCase):
         finally:
             settings.USE_TZ = settings_use_tz_backup
 
-    @mock.patch("requests.post", side_effect=mocked_requests_post)
+    @mock.patch(
+        "oauth2_provider.oauth2_validators._introspection_session.post", side_effect=mocked_requests_post
+    )
     def test_validate_bearer_token(self, mock_get):
         """
         Test method validate_bearer_token
@@ -201,7 +209,20 @@ class TestTokenIntrospectionAuth(TestCase):
         # with token validated through request and valid scope
         self.assertTrue(self.validator.validate_bearer_token("butzi", ["dolphin"], self.request))
 
-    @mock.patch("requests.post", side_effect=mocked_requests_post)
+    @mock.patch(
+        "oauth2_provider.oauth2_validators._introspection_session.post", side_effect=mocked_requests_post
+    )
+    def test_validate_bearer_token_caches_introspection_response(self, mock_get):
+        """
+        Test that a token is introspected only once while its response is cached
+        """
+        self.assertFalse(self.validator.validate_bearer_token("cached", ["kaudawelsch"], self.request))
+        self.assertFalse(self.validator.validate_bearer_token("cached", ["kaudawelsch"], self.request))
+        self.assertEqual(mock_get.call_count, 1)
+
+    @mock.patch(
+        "oauth2_provider.oauth2_validators._introspection_session.post", side_effect=mocked_requests_post
+    )
     def test_get_resource(self, mock_get):
         """
         Test that we can access the resource with a get request and a remotely validated token
@@ -212,7 +233,9 @@ class TestTokenIntrospectionAuth(TestCase):
         response = self.client.get("/oauth2-test-resource/", **auth_headers)
         self.assertEqual(response.content.decode("utf-8"), "This is a protected resource")
 
-    @mock.patch("requests.post", side_effect=mocked_requests_post)
+    @mock.patch(
+        "oauth2_provider.oauth2_validators._introspection_session.post", side_effect=mocked_requests_post
+    )
     def test_post_resource(self, mock_get):
         """
         Test that we can access the resource with a post request and a remotely validated token
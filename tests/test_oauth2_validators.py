@@ -72,6 +72,11 @@ class TestOAuth2Validator(TransactionTestCase):
         self.request.client_secret = "client_secret"
         self.assertTrue(self.validator._authenticate_request_body(self.request))
 
+    def test_authenticate_request_body_without_secret(self):
+        self.request.client_id = "client_id"
+        self.request.client_secret = None
+        self.assertFalse(self.validator._authenticate_request_body(self.request))
+
     def test_extract_basic_auth(self):
         self.request.headers = {"HTTP_AUTHORIZATION": "Basic 123456"}
         self.assertEqual(self.validator._extract_basic_auth(self.request), "123456")
@@ -152,6 +157,10 @@ class TestOAuth2Validator(TransactionTestCase):
     def test_load_application_fails_when_request_has_no_client(self):
         self.assertRaises(AssertionError, self.validator.authenticate_client_id, "client_id", {})
 
+    def test_validate_grant_type(self):
+        self.assertTrue(self.validator.validate_grant_type("client_id", "password", None, self.request))
+        self.assertFalse(self.validator.validate_grant_type("client_id", "unknown", None, self.request))
+
     def test_rotate_refresh_token__is_true(self):
         self.assertTrue(self.validator.rotate_refresh_token(mock.MagicMock()))
 
@@ -520,3 +529,66 @@ def test_validate_id_token_bad_token_no_aud(oauth2_settings, mocker, oidc_key):
     validator = OAuth2Validator()
     status = validator.validate_id_token(token.serialize(), ["openid"], mocker.sentinel.request)
     assert status is False
+
+
+@pytest.mark.django_db
+@pytest.mark.oauth2_settings(presets.OIDC_SETTINGS_RW)
+def test_validate_id_token_skips_signature_check_when_cached(oauth2_settings, mocker, oidc_tokens):
+    validator = OAuth2Validator()
+    assert validator.validate_id_token(oidc_tokens.id_token, ["openid"], mocker.MagicMock()) is True
+
+    mocker.patch("oauth2_provider.oauth2_validators.jwt.JWT", side_effect=jwt.JWTExpired)
+    request = mocker.MagicMock()
+    assert validator.validate_id_token(oidc_tokens.id_token, ["openid"], request) is True
+    assert request.user == oidc_tokens.user
+
+
+@pytest.mark.django_db
+@pytest.mark.oauth2_settings(presets.OIDC_SETTINGS_RW)
+def test_validate_id_token_cache_ignores_revoked_tokens(oauth2_settings, mocker, oidc_tokens):
+    validator = OAuth2Validator()
+    request = mocker.MagicMock()
+    assert validator.validate_id_token(oidc_tokens.id_token, ["openid"], request) is True
+
+    request.access_token.revoke()
+    assert validator.validate_id_token(oidc_tokens.id_token, ["openid"], mocker.MagicMock()) is False
+
+
+@pytest.mark.django_db
+@pytest.mark.oauth2_settings({"APPLICATION_CACHE_SECONDS": 60})
+def test_load_application_uses_cache(oauth2_settings, application, mocker, django_assert_num_queries):
+    validator = OAuth2Validator()
+    request = mocker.MagicMock(client=None)
+    assert validator._load_application(application.client_id, request) == application
+
+    request.client = None
+    with django_assert_num_queries(0):
+        assert validator._load_application(application.client_id, request) == application
+
+    application.name = "Renamed Application"
+    application.save()
+    request.client = None
+    assert validator._load_application(application.client_id, request).name == "Renamed Application"
+
+
+@pytest.mark.django_db
+@pytest.mark.oauth2_settings(presets.OIDC_SETTINGS_RW)
+def test_validate_id_token_cache_evicted_when_application_changes(oauth2_settings, mocker, oidc_tokens):
+    validator = OAuth2Validator()
+    assert validator.validate_id_token(oidc_tokens.id_token, ["openid"], mocker.MagicMock()) is True
+
+    oidc_tokens.application.save()
+    mocker.patch("oauth2_provider.oauth2_validators.jwt.JWT", side_effect=jwt.JWTExpired)
+    assert validator.validate_id_token(oidc_tokens.id_token, ["openid"], mocker.MagicMock()) is False
+
+
+@pytest.mark.django_db
+@pytest.mark.oauth2_settings({"APPLICATION_CACHE_SECONDS": 60})
+def test_load_application_cache_evicts_previous_client_id(oauth2_settings, application, mocker):
+    validator = OAuth2Validator()
+    old_client_id = application.client_id
+    assert validator._load_application(old_client_id, mocker.MagicMock(client=None)) == application
+
+    application.client_id = "new_client_id"
+    application.save()
+    assert validator._load_application(old_client_id, mocker.MagicMock(client=None)) is None
@@ -203,3 +203,77 @@ class TestRevocationView(BaseTest):
         response = self.client.post(url, data=data)
         self.assertEqual(response.status_code, 200)
         self.assertFalse(AccessToken.objects.filter(id=tok.id).exists())
+
+    def test_revoke_refresh_token_with_wrong_hint(self):
+        tok = AccessToken.objects.create(
+            user=self.test_user,
+            token="1234567890",
+            application=self.application,
+            expires=timezone.now() + datetime.timedelta(days=1),
+            scope="read write",
+        )
+        rtok = RefreshToken.objects.create(
+            user=self.test_user, token="999999999", application=self.application, access_token=tok
+        )
+
+        data = {
+            "client_id": self.application.client_id,
+            "client_secret": self.application.client_secret,
+            "token": rtok.token,
+            "token_type_hint": "access_token",
+        }
+
+        url = reverse("oauth2_provider:revoke-token")
+        response = self.client.post(url, data=data)
+        self.assertEqual(response.status_code, 200)
+        refresh_token = RefreshToken.objects.get(id=rtok.id)
+        self.assertIsNotNone(refresh_token.revoked)
+        self.assertFalse(AccessToken.objects.filter(id=tok.id).exists())
+
+    def test_revoke_refresh_token_sharing_token_with_revoked_refresh_token(self):
+        revoked_at = timezone.now() - datetime.timedelta(days=1)
+        revoked_rtok = RefreshToken.objects.create(
+            user=self.test_user, token="999999999", application=self.application, revoked=revoked_at
+        )
+        tok = AccessToken.objects.create(
+            user=self.test_user,
+            token="1234567890",
+            application=self.application,
+            expires=timezone.now() + datetime.timedelta(days=1),
+            scope="read write",
+        )
+        rtok = RefreshToken.objects.create(
+            user=self.test_user, token="999999999", application=self.application, access_token=tok
+        )
+
+        data = {
+            "client_id": self.application.client_id,
+            "client_secret": self.application.client_secret,
+            "token": rtok.token,
+            "token_type_hint": "refresh_token",
+        }
+
+        url = reverse("oauth2_provider:revoke-token")
+        response = self.client.post(url, data=data)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(RefreshToken.objects.get(id=rtok.id).revoked)
+        self.assertEqual(RefreshToken.objects.get(id=revoked_rtok.id).revoked, revoked_at)
+        self.assertFalse(AccessToken.objects.filter(id=tok.id).exists())
+
+    def test_revoke_already_revoked_refresh_token(self):
+        revoked_at = timezone.now() - datetime.timedelta(days=1)
+        rtok = RefreshToken.objects.create(
+            user=self.test_user, token="999999999", application=self.application, revoked=revoked_at
+        )
+
+        data = {
+            "client_id": self.application.client_id,
+            "client_secret": self.application.client_secret,
+            "token": rtok.token,
+            "token_type_hint": "refresh_token",
+        }
+
+        url = reverse("oauth2_provider:revoke-token")
+        response = self.client.post(url, data=data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(RefreshToken.objects.get(id=rtok.id).revoked, revoked_at)
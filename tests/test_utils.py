@@ -0,0 +1,9 @@
+from django.conf import settings
+
+from oauth2_provider.utils import jwk_from_pem
+
+
+def test_jwk_from_pem_is_cached():
+    key = jwk_from_pem(settings.OIDC_RSA_PRIVATE_KEY)
+    assert key["kty"] == "RSA"
+    assert jwk_from_pem(settings.OIDC_RSA_PRIVATE_KEY) is key